@@ -1,6 +1,11 @@
 """CSV Field Comparison Tool - Main Streamlit Application."""
 
 import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Tuple
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 
@@ -14,6 +19,132 @@ import utils
 import config
 
 
+@st.cache_data(show_spinner=False)
+def load_and_prepare(file_bytes: bytes) -> pd.DataFrame:
+    """Read an uploaded CSV and apply the preprocessing steps."""
+    df = pd.read_csv(
+        io.BytesIO(file_bytes), engine='pyarrow', dtype_backend='pyarrow'
+    )
+    df = utils.to_numpy_dtypes(df)
+    df = utils.normalize_df(df)
+    df = utils.fill_empty_with_blank(df)
+    df = utils.normalize_columns(df)
+    df = utils.strip_values(df)
+    return utils.categorize_columns(df, [config.JOB_NAME_COLUMN])
+
+
+@st.cache_data(show_spinner=False)
+def list_base_fields(columns: tuple) -> tuple:
+    """List the sorted base fields available for comparison.
+    
+    Also returns the lowercased field names, used by the field filter.
+    """
+    all_columns = [
+        col for col in columns
+        if col not in [config.ID_COLUMN, config.JOB_NAME_COLUMN]
+    ]
+    base_fields = sorted(set(utils.get_base_field(col) for col in all_columns))
+    return base_fields, np.array([f.lower() for f in base_fields], dtype=str)
+
+
+def run_analysis(
+    output_df: pd.DataFrame,
+    gold_df: pd.DataFrame,
+    selected_fields: list,
+    report_progress: Callable[[float, str], None]
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Compare the selected fields and compute accuracy per base attribute.
+    
+    Runs off the Streamlit script thread, so it must not call any st.*
+    function; progress is passed back through report_progress.
+    """
+    # Prepare data
+    report_progress(0.0, "Preparing data")
+    id_vars = [config.ID_COLUMN, config.JOB_NAME_COLUMN]
+    
+    # Keep only selected fields before melting
+    output_melted = utils.melt_dataframe(
+        utils.select_field_columns(output_df, selected_fields, id_vars),
+        id_vars
+    )
+    gold_melted = utils.melt_dataframe(
+        utils.select_field_columns(gold_df, selected_fields, id_vars),
+        id_vars
+    )
+    
+    # Rename columns
+    gold_melted.rename(
+        columns={config.JOB_NAME_COLUMN: config.GOLD_JOB_NAME_COLUMN},
+        inplace=True
+    )
+    output_melted.rename(
+        columns={config.JOB_NAME_COLUMN: config.OUTPUT_JOB_NAME_COLUMN},
+        inplace=True
+    )
+    
+    # Create unique IDs
+    output_melted, gold_melted = utils.create_unique_ids(
+        output_melted, gold_melted,
+        config.OUTPUT_JOB_NAME_COLUMN, config.GOLD_JOB_NAME_COLUMN
+    )
+    
+    # Merge
+    report_progress(0.2, "Merging datasets")
+    merged_df = utils.merge_dataframes(output_melted, gold_melted)
+    merged_df = utils.remove_empty_rows(merged_df)
+    
+    # Compute validity
+    report_progress(0.4, "Comparing values")
+    merged_df['validity'] = utils.compute_validity(
+        merged_df, selected_fields, config.THRESHOLD
+    )
+    
+    # Add missing gold rows
+    report_progress(0.7, "Checking missing gold values")
+    merged_df = utils.add_missing_gold_array_rows(
+        merged_df, selected_fields, config.THRESHOLD
+    )
+    
+    # Clean up
+    merged_df = merged_df.dropna(subset=['Attribute_output'])
+    
+    condition = ~(
+        (merged_df['job_id_output'] == config.NO_ID_PLACEHOLDER) &
+        (merged_df['Value_gold'].isna())
+    )
+    merged_df = merged_df[condition]
+    
+    # Convert to string to prevent Arrow errors, in a single Arrow cast.
+    # Done before marking so numeric or boolean columns accept the message.
+    value_columns = ["Value_output", "Value_gold"]
+    merged_df[value_columns] = merged_df[value_columns].astype("string[pyarrow]")
+    
+    # Mark fields in TEST but not in GOLD
+    mask = (
+        (merged_df['validity'] == config.INVALID_STATUS) &
+        (merged_df['job_id_output'] != config.NO_ID_PLACEHOLDER)
+    )
+    merged_df.loc[mask, 'Value_gold'] = config.FIELD_IN_TEST_NOT_GOLD
+    
+    # Calculate accuracy
+    report_progress(0.9, "Calculating accuracy")
+    accuracy_base_attribute = utils.aggregate_base_attributes(merged_df)
+    accuracy_df = pd.DataFrame({
+        'Attribute': list(accuracy_base_attribute.keys()),
+        'Valid Count': [
+            d['valid'] for d in accuracy_base_attribute.values()
+        ],
+        'Total Count': [
+            d['total'] for d in accuracy_base_attribute.values()
+        ],
+        'Accuracy (%)': [
+            d['accuracy'] for d in accuracy_base_attribute.values()
+        ]
+    })
+    
+    return merged_df, accuracy_df
+
+
 def main():
     """Main application entry point."""
     st.set_page_config(
@@ -42,16 +173,16 @@ def main():
         st.info("📁 Please upload both TEST and GOLD CSV files to proceed.")
         st.stop()
     
-    # Read uploaded files
+    # Read and preprocess uploaded files
     try:
-        output_df = pd.read_csv(uploaded_test)
+        output_df = load_and_prepare(uploaded_test.getvalue())
         st.success(f"✓ TEST file loaded: {len(output_df)} rows")
     except Exception as e:
         st.error(f"❌ Error reading TEST CSV: {e}")
         st.stop()
     
     try:
-        gold_df = pd.read_csv(uploaded_gold)
+        gold_df = load_and_prepare(uploaded_gold.getvalue())
         st.success(f"✓ GOLD file loaded: {len(gold_df)} rows")
     except Exception as e:
         st.error(f"❌ Error reading GOLD CSV: {e}")
@@ -59,19 +190,6 @@ def main():
     
     feedback = st.empty()
     
-    # Process dataframes
-    output_df = utils.normalize_df(output_df)
-    gold_df = utils.normalize_df(gold_df)
-    
-    output_df = utils.fill_empty_with_blank(output_df)
-    gold_df = utils.fill_empty_with_blank(gold_df)
-    
-    output_df = utils.normalize_columns(output_df)
-    gold_df = utils.normalize_columns(gold_df)
-    
-    output_df = utils.strip_values(output_df)
-    gold_df = utils.strip_values(gold_df)
-    
     # Validate job names
     job_names_test = output_df[config.JOB_NAME_COLUMN].unique()
     job_names_gold = gold_df[config.JOB_NAME_COLUMN].unique()
@@ -91,17 +209,14 @@ def main():
             st.success("✓ All job names match between datasets.")
     
     # Step 2: Field selection
-    all_columns = [
-        col for col in output_df.columns
-        if col not in [config.ID_COLUMN, config.JOB_NAME_COLUMN]
-    ]
-    base_fields = sorted(set(utils.get_base_field(col) for col in all_columns))
+    base_fields, base_fields_lower = list_base_fields(tuple(output_df.columns))
     
     with st.expander("Step 2: Select fields to compare", expanded=True):
         filter_text = st.text_input("🔍 Filter fields:", value="")
-        filtered_fields = [
-            f for f in base_fields if filter_text.lower() in f.lower()
-        ]
+        filtered_fields = base_fields
+        if filter_text:
+            matches = np.char.find(base_fields_lower, filter_text.lower()) >= 0
+            filtered_fields = [base_fields[i] for i in np.flatnonzero(matches)]
         
         if "prev_select_all" not in st.session_state:
             st.session_state.prev_select_all = False
@@ -138,94 +253,29 @@ def main():
     with col2:
         if st.button("🚀 Run Analysis", type="primary", use_container_width=True):
             try:
-                with st.spinner("🔄 Running analysis..."):
-                    # Prepare data
-                    id_vars = [config.ID_COLUMN, config.JOB_NAME_COLUMN]
-                    output_melted = utils.melt_dataframe(output_df, id_vars)
-                    gold_melted = utils.melt_dataframe(gold_df, id_vars)
-                    
-                    # Filter to selected fields
-                    output_melted = output_melted[
-                        output_melted['Attribute'].apply(
-                            lambda x: utils.get_base_field(x) in selected_fields
-                        )
-                    ]
-                    gold_melted = gold_melted[
-                        gold_melted['Attribute'].apply(
-                            lambda x: utils.get_base_field(x) in selected_fields
-                        )
-                    ]
+                with st.status("🔄 Running analysis...") as status:
+                    progress_bar = st.progress(0.0)
+                    progress = {'fraction': 0.0, 'message': ""}
                     
-                    # Rename columns
-                    gold_melted.rename(
-                        columns={config.JOB_NAME_COLUMN: config.GOLD_JOB_NAME_COLUMN},
-                        inplace=True
-                    )
-                    output_melted.rename(
-                        columns={config.JOB_NAME_COLUMN: config.OUTPUT_JOB_NAME_COLUMN},
-                        inplace=True
-                    )
+                    def report_progress(fraction: float, message: str) -> None:
+                        progress.update(fraction=fraction, message=message)
                     
-                    # Create unique IDs
-                    output_melted = utils.create_unique_id(
-                        output_melted, config.OUTPUT_JOB_NAME_COLUMN
-                    )
-                    gold_melted = utils.create_unique_id(
-                        gold_melted, config.GOLD_JOB_NAME_COLUMN
-                    )
-                    
-                    # Merge
-                    merged_df = utils.merge_dataframes(output_melted, gold_melted)
-                    merged_df = utils.remove_empty_rows(merged_df)
-                    
-                    # Compute validity
-                    merged_df['validity'] = merged_df.apply(
-                        lambda row: utils.compute_validity(
-                            row, merged_df, selected_fields, config.THRESHOLD
-                        ),
-                        axis=1
-                    )
-                    
-                    # Add missing gold rows
-                    merged_df = utils.add_missing_gold_array_rows(
-                        merged_df, selected_fields, config.THRESHOLD
-                    )
-                    
-                    # Clean up
-                    merged_df = merged_df.dropna(subset=['Attribute_output'])
-                    
-                    condition = ~(
-                        (merged_df['job_id_output'] == config.NO_ID_PLACEHOLDER) &
-                        (merged_df['Value_gold'].isna())
-                    )
-                    merged_df = merged_df[condition]
-                    
-                    # Mark fields in TEST but not in GOLD
-                    mask = (
-                        (merged_df['validity'] == config.INVALID_STATUS) &
-                        (merged_df['job_id_output'] != config.NO_ID_PLACEHOLDER)
-                    )
-                    merged_df.loc[mask, 'Value_gold'] = config.FIELD_IN_TEST_NOT_GOLD
-                    
-                    # Convert to string to prevent Arrow errors
-                    for col in ["Value_output", "Value_gold"]:
-                        if col in merged_df.columns:
-                            merged_df[col] = merged_df[col].astype("string")
+                    # Keep the script thread free to redraw while the
+                    # pandas/rapidfuzz work runs in the background
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        future = executor.submit(
+                            run_analysis, output_df, gold_df,
+                            selected_fields, report_progress
+                        )
+                        while not future.done():
+                            progress_bar.progress(
+                                progress['fraction'], text=progress['message']
+                            )
+                            time.sleep(0.1)
                     
-                    # Calculate accuracy
-                    accuracy_base_attribute = utils.aggregate_base_attributes(merged_df)
-                    accuracy_df = pd.DataFrame({
-                        'Attribute': list(accuracy_base_attribute.keys()),
-                        'Valid Count': [
-                            d['valid'] for d in accuracy_base_attribute.values()
-                        ],
-                        'Total Count': [
-                            d['total'] for d in accuracy_base_attribute.values()
-                        ],
-                        'Accuracy (%)': [
-                            d['accuracy'] for d in accuracy_base_attribute.values()
-                        ]
-                    })
+                    merged_df, accuracy_df = future.result()
+                    progress_bar.progress(1.0, text="Done")
+                    status.update(label="✅ Analysis finished", state="complete")
                 
                 feedback.success("✅ Analysis completed!")
                 
@@ -252,14 +302,40 @@ def main():
                 
                 # Create Excel download
                 output = io.BytesIO()
-                with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                    merged_df.to_excel(writer, sheet_name='Comparison Results', index=False)
+                merged_df['unique_id'] = utils.format_unique_ids(
+                    merged_df, config.OUTPUT_JOB_NAME_COLUMN
+                )
+                # Select the exported columns in to_excel rather than
+                # writing a copy of the merged frame
+                internal_columns = [
+                    'base_attr_output', 'is_array_output',
+                    'base_attr_gold', 'is_array_gold'
+                ]
+                export_columns = [
+                    col for col in merged_df.columns
+                    if col not in internal_columns
+                ]
+                # Values are written as plain text: skip xlsxwriter's per-cell
+                # URL and formula detection
+                with pd.ExcelWriter(
+                    output, engine="xlsxwriter",
+                    engine_kwargs={'options': {
+                        'strings_to_urls': False,
+                        'strings_to_formulas': False
+                    }}
+                ) as writer:
+                    merged_df.to_excel(
+                        writer, sheet_name='Comparison Results',
+                        columns=export_columns, index=False
+                    )
                     accuracy_df.to_excel(writer, sheet_name='Accuracy Metrics', index=False)
                 output.seek(0)
                 
                 st.divider()
                 col1, col2, col3 = st.columns([1, 2, 1])
                 with col2:
+                    # download_button only accepts bytes or file objects,
+                    # so output.getbuffer() (a memoryview) cannot be passed
                     st.download_button(
                         label="📥 Download Detailed Results (Excel)",
                         data=output.getvalue(),
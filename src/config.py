@@ -21,6 +21,10 @@ COMPARE_FIELDS: List[str] = [
 # 0.8 means 80% similarity is required for a match
 THRESHOLD: float = 0.8
 
+# Minimum number of value pairs before fuzzy scoring runs on all CPU cores
+# Smaller batches stay single-threaded to avoid thread startup overhead
+PARALLEL_SCORING_MIN_PAIRS: int = 10000
+
 # Placeholder values
 EMPTY_CELL_PLACEHOLDER: str = "false"
 NO_VALUE_PLACEHOLDER: str = "No Value"
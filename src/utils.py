@@ -1,16 +1,55 @@
 """Utility functions for CSV data processing and comparison."""
 
 import re
-import difflib
-from typing import Dict, Any, Set
+from typing import Dict, Any, Set, Tuple
 import pandas as pd
 import numpy as np
+from rapidfuzz import fuzz, process
 import config
 
 
+def _string_columns(df: pd.DataFrame) -> list:
+    """Return the positions of the columns that hold string values.
+    
+    Positions rather than labels, since stripped headers may repeat.
+    Object columns qualify only if the .str accessor accepts them.
+    """
+    positions = []
+    for i, dtype in enumerate(df.dtypes):
+        if dtype == object:
+            inferred = pd.api.types.infer_dtype(df.iloc[:, i], skipna=True)
+            if inferred in ('string', 'empty', 'mixed', 'mixed-integer'):
+                positions.append(i)
+        elif pd.api.types.is_string_dtype(dtype):
+            positions.append(i)
+    return positions
+
+
+def to_numpy_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert typed Arrow columns to the dtypes of the default CSV reader.
+    
+    Integers with blanks become floats and booleans with blanks objects, so
+    values compare and print as before; all-empty columns become float NaN.
+    Dates and timestamps become strings. String columns stay Arrow-backed.
+    """
+    for i, dtype in enumerate(df.dtypes):
+        if not isinstance(dtype, pd.ArrowDtype) or pd.api.types.is_string_dtype(dtype):
+            continue
+        if dtype.kind in 'mM':
+            df.isetitem(i, df.iloc[:, i].astype('string[pyarrow]'))
+        else:
+            df.isetitem(i, df.iloc[:, i].to_numpy(na_value=np.nan))
+    return df
+
+
 def normalize_df(df: pd.DataFrame) -> pd.DataFrame:
     """Convert all string values to lowercase."""
-    return df.applymap(lambda x: x.lower() if isinstance(x, str) else x)
+    for i in _string_columns(df):
+        values = df.iloc[:, i]
+        lowered = values.str.lower()
+        # Non-string cells come back as NaN and keep their original value
+        df.isetitem(i, lowered.where(lowered.notna(), values))
+    return df
 
 
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -21,37 +60,126 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
 
 def fill_empty_with_blank(df: pd.DataFrame) -> pd.DataFrame:
     """Replace NaN values with placeholder."""
+    # Typed (e.g. Arrow numeric) columns cannot hold the string placeholder
+    string_columns = set(_string_columns(df))
+    for i in range(df.shape[1]):
+        if i not in string_columns and df.iloc[:, i].hasnans:
+            df.isetitem(i, df.iloc[:, i].astype(object))
     return df.fillna(config.EMPTY_CELL_PLACEHOLDER)
 
 
 def strip_values(df: pd.DataFrame) -> pd.DataFrame:
     """Strip whitespace and handle empty strings."""
-    def clean_cell(x: Any) -> Any:
-        if pd.isna(x):
-            return config.NO_VALUE_PLACEHOLDER
-        if isinstance(x, str):
-            stripped = x.strip()
-            return stripped if stripped else config.NO_VALUE_PLACEHOLDER
-        return x
-    return df.applymap(clean_cell)
+    string_columns = set(_string_columns(df))
+    for i in range(df.shape[1]):
+        values = df.iloc[:, i]
+        if i in string_columns:
+            stripped = values.str.strip()
+            values = stripped.where(stripped.notna(), values)
+            values = values.mask(values == '', config.NO_VALUE_PLACEHOLDER)
+        df.isetitem(i, values.fillna(config.NO_VALUE_PLACEHOLDER))
+    return df
+
+
+def categorize_columns(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """Store repeated string columns as pandas categoricals."""
+    for col in columns:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def select_field_columns(df: pd.DataFrame, fields: list, id_vars: list) -> pd.DataFrame:
+    """Keep the id columns and every column whose base field is selected.
+    
+    Field columns are cast to the dtype melting the full frame would give
+    'Value', so a field's values do not depend on what else is selected.
+    """
+    selected = set(fields)
+    # Select by position: label lookup would repeat duplicated headers
+    positions = [
+        i for i, col in enumerate(df.columns)
+        if col in id_vars or get_base_field(col) in selected
+    ]
+    narrowed = df.iloc[:, positions]
+    
+    value_dtype = pd.melt(df.iloc[:0], id_vars=id_vars)['value'].dtype
+    for i, (col, dtype) in enumerate(zip(narrowed.columns, narrowed.dtypes)):
+        if col not in id_vars and dtype != value_dtype:
+            narrowed.isetitem(i, narrowed.iloc[:, i].astype(value_dtype))
+    return narrowed
 
 
 def melt_dataframe(df: pd.DataFrame, id_vars: list) -> pd.DataFrame:
-    """Transform DataFrame from wide to long format."""
-    return pd.melt(df, id_vars=id_vars, var_name='Attribute', value_name='Value')
+    """Transform DataFrame from wide to long format.
+    
+    Adds the cached 'base_attr' and 'is_array' columns. Melting stacks each
+    source column as one block of rows, so both are derived once per source
+    column and repeated per block instead of being looked up per cell.
+    """
+    melted = pd.melt(df, id_vars=id_vars, var_name='Attribute', value_name='Value')
+    attributes = pd.Index([col for col in df.columns if col not in id_vars])
+    block_codes = np.repeat(np.arange(len(attributes)), len(df))
+    
+    # Stripped headers may repeat, so categories come from the unique names
+    attr_codes, attr_names = pd.factorize(attributes)
+    base_codes, base_fields = pd.factorize(attributes.map(get_base_field), sort=True)
+    melted['Attribute'] = pd.Categorical.from_codes(
+        attr_codes[block_codes], categories=attr_names
+    )
+    melted['base_attr'] = pd.Categorical.from_codes(
+        base_codes[block_codes], categories=base_fields
+    )
+    melted['is_array'] = np.asarray(attributes.map(is_array_field), dtype=bool)[block_codes]
+    return melted
 
 
-def create_unique_id(df: pd.DataFrame, job_name_col: str) -> pd.DataFrame:
-    """Create unique identifier by combining job name and attribute."""
-    df['unique_id'] = df[job_name_col] + '_' + df['Attribute']
-    return df
+def create_unique_ids(
+    output_df: pd.DataFrame,
+    gold_df: pd.DataFrame,
+    output_job_col: str,
+    gold_job_col: str
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Create integer identifiers shared by output and gold rows.
+    
+    Job names and attributes are re-coded against the union of both
+    frames' categories, then packed into one int64 key: the job name code
+    in the high 32 bits and the attribute code in the low 32 bits.
+    """
+    codes = []
+    for output_col, gold_col in [
+        (output_job_col, gold_job_col), ('Attribute', 'Attribute')
+    ]:
+        output_values = output_df[output_col].astype('category')
+        gold_values = gold_df[gold_col].astype('category')
+        categories = output_values.cat.categories.union(gold_values.cat.categories)
+        output_df[output_col] = output_values.cat.set_categories(categories)
+        gold_df[gold_col] = gold_values.cat.set_categories(categories)
+        codes.append((
+            output_df[output_col].cat.codes.to_numpy(dtype=np.int64),
+            gold_df[gold_col].cat.codes.to_numpy(dtype=np.int64)
+        ))
+    
+    (output_job, gold_job), (output_attr, gold_attr) = codes
+    output_df['unique_id'] = (output_job << 32) | output_attr
+    gold_df['unique_id'] = (gold_job << 32) | gold_attr
+    return output_df, gold_df
+
+
+def format_unique_ids(df: pd.DataFrame, job_col: str) -> pd.Series:
+    """Spell out the integer keys as readable 'job_name_attribute' ids."""
+    return df[job_col].astype(str) + '_' + df['Attribute_output'].astype(str)
 
 
 def merge_dataframes(output_df: pd.DataFrame, gold_df: pd.DataFrame) -> pd.DataFrame:
-    """Merge output and gold DataFrames."""
+    """Merge output and gold DataFrames.
+    
+    The join stays outer: gold-only rows feed add_missing_gold_array_rows.
+    Keys repeat per job name, so the join is many-to-many.
+    """
     return pd.merge(
         output_df, gold_df, on='unique_id',
-        suffixes=('_output', '_gold'), how='outer'
+        suffixes=('_output', '_gold'), how='outer',
+        sort=False, validate='many_to_many'
     )
 
 
@@ -73,129 +201,196 @@ def get_base_field(attr: Any) -> str:
     return re.sub(r'\[\d+\]|\(\)', '', str(attr))
 
 
+def is_array_field(attr: Any) -> bool:
+    """Check whether an attribute name carries an array index.
+    
+    Examples:
+        'field[0]' -> True
+        'field' -> False
+    """
+    if pd.isna(attr):
+        return False
+    return re.search(r'\[\d+\]', str(attr)) is not None
+
+
 def similarity_ratio(a: Any, b: Any) -> float:
     """Calculate similarity ratio between two values."""
-    return difflib.SequenceMatcher(None, str(a), str(b)).ratio()
+    return fuzz.ratio(str(a), str(b)) / 100.0
+
+
+def _scoring_workers(pair_count: int) -> int:
+    """Use every core for large scoring batches, one thread for small ones."""
+    return -1 if pair_count >= config.PARALLEL_SCORING_MIN_PAIRS else 1
+
+
+def _similarity_matches(values: list, candidates: list, threshold: float) -> np.ndarray:
+    """Flag each value that is similar enough to at least one candidate."""
+    if not len(values) or not len(candidates):
+        return np.zeros(len(values), dtype=bool)
+    scores = process.cdist(
+        [str(v) for v in values], [str(c) for c in candidates],
+        scorer=fuzz.ratio, score_cutoff=threshold * 100, dtype=np.float64,
+        workers=_scoring_workers(len(values) * len(candidates))
+    )
+    return scores.max(axis=1) >= threshold * 100
 
 
 def compute_validity(
-    row: pd.Series,
     merged_df: pd.DataFrame,
     compare_fields: list,
     threshold: float
-) -> str:
-    """Compute validity status for a row based on comparison rules."""
-    val_output = row['Value_output']
-    val_gold = row['Value_gold']
-    attribute_output = row['Attribute_output']
-    job_name_output = row['job_name_output']
-    
-    base_attr = get_base_field(attribute_output)
-    in_compare = base_attr in compare_fields
-    
-    # Check if it's an array field
-    is_array = (
-        pd.notna(attribute_output) and 
-        isinstance(attribute_output, str) and 
-        '[' in attribute_output and ']' in attribute_output
+) -> pd.Series:
+    """Compute validity status for every row based on comparison rules."""
+    val_output = merged_df['Value_output']
+    val_gold = merged_df['Value_gold']
+    job_name_output = merged_df['job_name_output']
+    
+    base_attr = merged_df['base_attr_output']
+    in_compare = base_attr.isin(set(compare_fields)).to_numpy()
+    is_array = merged_df['is_array_output'].eq(True).to_numpy()
+    
+    # Array fields are compared against every gold value sharing the
+    # same job name and base attribute, tracked as integer group codes
+    group_codes = (
+        val_gold.groupby(
+            [job_name_output, base_attr], sort=False, dropna=False, observed=True
+        )
+        .ngroup()
+        .to_numpy()
     )
+    gold_present = val_gold.notna().to_numpy()
+    group_has_nan_gold = np.isin(group_codes, group_codes[~gold_present])
     
-    if in_compare:
-        # Use similarity matching for fields in COMPARE_FIELDS
-        if is_array:
-            return _validate_array_similarity(
-                val_output, job_name_output, attribute_output,
-                merged_df, threshold
-            )
-        else:
-            return _validate_single_similarity(val_output, val_gold, threshold)
-    else:
-        # Use exact matching for other fields
-        if is_array:
-            return _validate_array_exact(
-                val_output, val_gold, job_name_output,
-                attribute_output, merged_df
-            )
-        else:
-            return _validate_single_exact(val_output, val_gold)
-
-
-def _validate_array_similarity(
-    val_output: Any,
-    job_name_output: str,
-    attribute_output: str,
-    merged_df: pd.DataFrame,
-    threshold: float
-) -> str:
-    """Validate array field using similarity matching."""
-    attribute_prefix = get_base_field(attribute_output)
-    relevant_rows = merged_df[
-        (merged_df['job_name_output'] == job_name_output) &
-        (merged_df['Attribute_output'].apply(get_base_field) == attribute_prefix)
-    ]
+    valid = pd.Series(False, index=merged_df.index)
+    
+    # Use similarity matching for fields in COMPARE_FIELDS
+    mask = in_compare & is_array
+    if mask.any():
+        gold_values = _build_value_index(
+            merged_df, ['job_name_output', 'base_attr_output'], 'Value_gold'
+        )
+        valid[mask] = _validate_array_similarity(
+            val_output[mask], job_name_output[mask], base_attr[mask],
+            gold_values, group_has_nan_gold[mask], threshold
+        ).to_numpy()
     
-    gold_values = set(relevant_rows['Value_gold'].dropna().unique())
+    mask = in_compare & ~is_array
+    if mask.any():
+        valid[mask] = _validate_single_similarity(
+            val_output[mask], val_gold[mask], threshold
+        ).to_numpy()
     
-    # Check if output is NaN and any gold value is NaN
-    if pd.isna(val_output):
-        if relevant_rows['Value_gold'].isna().any():
-            return config.VALID_STATUS
+    # Use exact matching for other fields
+    mask = ~in_compare & is_array
+    if mask.any():
+        value_codes, uniques = pd.factorize(
+            pd.concat([val_output, val_gold], ignore_index=True)
+        )
+        output_codes = value_codes[:len(merged_df)]
+        gold_codes = value_codes[len(merged_df):]
+        # Encode each (group, value) pair as a single integer key
+        output_keys = group_codes * len(uniques) + output_codes
+        gold_keys = (group_codes * len(uniques) + gold_codes)[gold_present]
+        valid[mask] = _validate_array_exact(
+            output_keys[mask], output_codes[mask] < 0, gold_codes[mask] < 0,
+            gold_keys, group_has_nan_gold[mask]
+        )
     
-    # Check similarity with all gold values
-    for gold_val in gold_values:
-        if similarity_ratio(val_output, gold_val) >= threshold:
-            return config.VALID_STATUS
+    mask = ~in_compare & ~is_array
+    if mask.any():
+        valid[mask] = _validate_single_exact(
+            val_output[mask], val_gold[mask]
+        ).to_numpy()
     
-    return config.INVALID_STATUS
+    return pd.Series(
+        np.where(valid, config.VALID_STATUS, config.INVALID_STATUS),
+        index=merged_df.index
+    )
 
 
-def _validate_single_similarity(val_output: Any, val_gold: Any, threshold: float) -> str:
-    """Validate single field using similarity matching."""
-    if pd.isna(val_output) and pd.isna(val_gold):
-        return config.VALID_STATUS
-    if pd.isna(val_output) or pd.isna(val_gold):
-        return config.INVALID_STATUS
+def _build_value_index(
+    df: pd.DataFrame,
+    key_columns: list,
+    value_column: str
+) -> Dict[tuple, frozenset]:
+    """Map each key combination to the set of non-null values found under it."""
     return (
-        config.VALID_STATUS 
-        if similarity_ratio(val_output, val_gold) >= threshold 
-        else config.INVALID_STATUS
+        df[key_columns + [value_column]]
+        .dropna()
+        .groupby(key_columns, sort=False, observed=True)[value_column]
+        .agg(frozenset)
+        .to_dict()
     )
 
 
-def _validate_array_exact(
-    val_output: Any,
-    val_gold: Any,
-    job_name_output: str,
-    attribute_output: str,
-    merged_df: pd.DataFrame
-) -> str:
-    """Validate array field using exact matching."""
-    attribute_prefix = get_base_field(attribute_output)
-    relevant_rows = merged_df[
-        (merged_df['job_name_output'] == job_name_output) &
-        (merged_df['Attribute_output'].apply(get_base_field) == attribute_prefix)
-    ]
-    
-    gold_values = set(relevant_rows['Value_gold'].dropna().unique())
+def _validate_array_similarity(
+    val_output: pd.Series,
+    job_name_output: pd.Series,
+    base_attr: pd.Series,
+    gold_values: Dict[tuple, frozenset],
+    group_has_nan_gold: pd.Series,
+    threshold: float
+) -> pd.Series:
+    """Validate array field using similarity matching."""
+    # Output is NaN and any gold value of the group is NaN
+    valid = val_output.isna() & group_has_nan_gold
     
-    # Check if output is NaN and any gold value is NaN
-    if pd.isna(val_output):
-        if relevant_rows['Value_gold'].isna().any():
-            return config.VALID_STATUS
+    # Check similarity with all gold values, once per distinct output value
+    for key, values in val_output.groupby(
+        [job_name_output, base_attr], sort=False, observed=True
+    ):
+        # Dedupe on the scored text: unique() would merge 1 and 1.0
+        values = values.astype(str)
+        distinct = values.unique()
+        matches = _similarity_matches(distinct, gold_values.get(key, ()), threshold)
+        valid[values.index] |= values.map(dict(zip(distinct, matches))).astype(bool)
     
-    if val_output in gold_values:
-        return config.VALID_STATUS
-    if pd.isna(val_output) and pd.isna(val_gold):
-        return config.VALID_STATUS
+    return valid
+
+
+def _validate_single_similarity(
+    val_output: pd.Series,
+    val_gold: pd.Series,
+    threshold: float
+) -> pd.Series:
+    """Validate single field using similarity matching."""
+    output_missing = val_output.isna()
+    gold_missing = val_gold.isna()
+    valid = output_missing & gold_missing
     
-    return config.INVALID_STATUS
+    comparable = ~output_missing & ~gold_missing
+    if comparable.any():
+        scores = process.cpdist(
+            val_output[comparable].astype(str).tolist(),
+            val_gold[comparable].astype(str).tolist(),
+            scorer=fuzz.ratio, dtype=np.float64,
+            workers=_scoring_workers(int(comparable.sum()))
+        )
+        valid[comparable] = scores >= threshold * 100
+    return valid
+
+
+def _validate_array_exact(
+    output_keys: np.ndarray,
+    output_missing: np.ndarray,
+    gold_missing: np.ndarray,
+    gold_keys: np.ndarray,
+    group_has_nan_gold: np.ndarray
+) -> np.ndarray:
+    """Validate array field using exact matching on encoded group/value keys."""
+    in_gold = np.isin(output_keys, gold_keys) & ~output_missing
+    return (
+        (output_missing & group_has_nan_gold) |
+        in_gold |
+        (output_missing & gold_missing)
+    )
 
 
-def _validate_single_exact(val_output: Any, val_gold: Any) -> str:
+def _validate_single_exact(val_output: pd.Series, val_gold: pd.Series) -> pd.Series:
     """Validate single field using exact matching."""
-    if pd.isna(val_output) and pd.isna(val_gold):
-        return config.VALID_STATUS
-    return config.VALID_STATUS if val_output == val_gold else config.INVALID_STATUS
+    # Arrow-backed strings compare to NA when either side is missing
+    matches = (val_output == val_gold).fillna(False).astype(bool)
+    return matches | (val_output.isna() & val_gold.isna())
 
 
 def add_missing_gold_array_rows(
@@ -204,85 +399,99 @@ def add_missing_gold_array_rows(
     threshold: float
 ) -> pd.DataFrame:
     """Add rows for gold array values that don't exist in output."""
-    # Identify gold array rows
-    gold_array_mask = merged_df['Attribute_gold'].str.contains(r'\[\d+\]', na=False)
-    gold_array_rows = merged_df[gold_array_mask].copy()
+    # Identify gold array rows, reading only the columns used for matching
+    gold_array_mask = merged_df['is_array_gold'].eq(True).to_numpy()
     
-    if gold_array_rows.empty:
+    if not gold_array_mask.any():
         return merged_df
     
-    # Prepare for matching
-    gold_array_rows['attr_prefix'] = gold_array_rows['Attribute_gold'].apply(get_base_field)
-    merged_df['attr_prefix_output'] = merged_df['Attribute_output'].apply(get_base_field)
+    job_name = merged_df['job_name_gold'][gold_array_mask]
+    attr_prefix = merged_df['base_attr_gold'][gold_array_mask]
+    gold_values = merged_df['Value_gold'][gold_array_mask]
+    in_compare = attr_prefix.isin(set(compare_fields)).to_numpy()
+    is_found = np.zeros(len(gold_values), dtype=bool)
     
-    # Build lookup for output values
-    output_lookup = (
-        merged_df
-        .dropna(subset=['job_name_output', 'attr_prefix_output'])
-        .groupby(['job_name_output', 'attr_prefix_output'])['Value_output']
-        .apply(lambda x: set(x.dropna().unique()))
-        .to_dict()
-    )
+    # Exact fields: anti-join gold values against output values as strings
+    mask = ~in_compare
+    if mask.any():
+        output_rows = (
+            merged_df[['job_name_output', 'base_attr_output', 'Value_output']]
+            .dropna()
+            .drop_duplicates()
+        )
+        output_keys = pd.MultiIndex.from_arrays([
+            output_rows['job_name_output'],
+            output_rows['base_attr_output'],
+            output_rows['Value_output'].astype(str)
+        ])
+        gold_keys = pd.MultiIndex.from_arrays([
+            job_name[mask], attr_prefix[mask], gold_values[mask].astype(str)
+        ])
+        is_found[mask] = gold_keys.isin(output_keys)
     
-    new_rows = []
-    for _, gold_row in gold_array_rows.iterrows():
-        job_name = gold_row['job_name_gold']
-        attr_prefix = gold_row['attr_prefix']
-        gold_value = gold_row['Value_gold']
-        in_compare = attr_prefix in compare_fields
-        
-        output_values = output_lookup.get((job_name, attr_prefix), set())
-        
-        # Check if gold value exists in output
-        is_found = False
-        if in_compare:
-            is_found = any(
-                similarity_ratio(gold_value, output_val) >= threshold
-                for output_val in output_values
-            )
-        else:
-            is_found = str(gold_value) in {str(val) for val in output_values}
-        
-        if not is_found:
-            new_rows.append({
-                'job_id_output': config.NO_ID_PLACEHOLDER,
-                'job_name_output': gold_row['job_name_gold'],
-                'Attribute_output': gold_row['Attribute_gold'],
-                'Value_output': config.FIELD_IN_GOLD_NOT_TEST,
-                'unique_id': gold_row['unique_id'],
-                'job_id_gold': gold_row['job_id_gold'],
-                'job_name_gold': gold_row['job_name_gold'],
-                'Attribute_gold': gold_row['Attribute_gold'],
-                'Value_gold': gold_value,
-                'validity': config.INVALID_STATUS
-            })
-    
-    if new_rows:
-        merged_df = pd.concat([merged_df, pd.DataFrame(new_rows)], ignore_index=True)
-    
-    return merged_df
+    # Similarity fields: score each group's gold values against its output values
+    mask = in_compare
+    if mask.any():
+        output_lookup = _build_value_index(
+            merged_df, ['job_name_output', 'base_attr_output'], 'Value_output'
+        )
+        found = pd.Series(False, index=gold_values.index[mask])
+        for key, values in gold_values[mask].groupby(
+            [job_name[mask], attr_prefix[mask]], sort=False, observed=True
+        ):
+            # Dedupe on the scored text: unique() would merge 1 and 1.0
+            values = values.astype(str)
+            distinct = values.unique()
+            matches = _similarity_matches(distinct, output_lookup.get(key, ()), threshold)
+            found[values.index] = values.map(dict(zip(distinct, matches))).astype(bool)
+        is_found[mask] = found.to_numpy()
+    
+    if is_found.all():
+        return merged_df
+    
+    # Build all gold-only rows at once from the unmatched gold columns
+    missing_mask = gold_array_mask.copy()
+    missing_mask[gold_array_mask] = ~is_found
+    missing = merged_df.loc[missing_mask, [
+        'unique_id', 'job_id_gold', 'job_name_gold', 'Attribute_gold',
+        'Value_gold', 'base_attr_gold'
+    ]]
+    
+    new_rows = pd.DataFrame({
+        'job_id_output': config.NO_ID_PLACEHOLDER,
+        'job_name_output': missing['job_name_gold'],
+        'Attribute_output': missing['Attribute_gold'],
+        'Value_output': config.FIELD_IN_GOLD_NOT_TEST,
+        'base_attr_output': missing['base_attr_gold'],
+        'is_array_output': True,
+        'unique_id': missing['unique_id'],
+        'job_id_gold': missing['job_id_gold'],
+        'job_name_gold': missing['job_name_gold'],
+        'Attribute_gold': missing['Attribute_gold'],
+        'Value_gold': missing['Value_gold'],
+        'base_attr_gold': missing['base_attr_gold'],
+        'is_array_gold': True,
+        'validity': config.INVALID_STATUS
+    })
+    
+    return pd.concat([merged_df, new_rows], ignore_index=True)
 
 
 def aggregate_base_attributes(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
     """Calculate accuracy statistics grouped by base attribute."""
-    # Extract base attribute
-    attr_output = df['Attribute_output'].fillna('')
-    attr_gold = df['Attribute_gold'].fillna('')
-    
-    df = df.copy()
-    df['base_attribute'] = (
-        attr_output
-        .where(attr_output != '', attr_gold)
-        .str.replace(r'\[\d+\]', '', regex=True)
-        .str.strip()
-    )
+    # Reuse the base attribute cached at melt time, falling back to gold
+    base_attribute = df['base_attr_output']
+    if base_attribute.isna().any():
+        base_attribute = base_attribute.astype(object).fillna(
+            df['base_attr_gold'].astype(object)
+        )
     
     # Group and aggregate
-    grouped = df.groupby('base_attribute')['validity'].agg([
-        ('valid', lambda x: (x == config.VALID_STATUS).sum()),
-        ('total', 'count')
-    ]).reset_index()
+    is_valid = df['validity'] == config.VALID_STATUS
+    grouped = is_valid.groupby(base_attribute, observed=True).agg(
+        valid='sum', total='size'
+    )
     
     grouped['accuracy'] = (grouped['valid'] / grouped['total'] * 100).round(2)
     
-    return grouped.set_index('base_attribute')[['valid', 'total', 'accuracy']].to_dict('index')
\ No newline at end of file
+    return grouped[['valid', 'total', 'accuracy']].to_dict('index')
\ No newline at end of file